@@ -0,0 +1,133 @@
+import sys
+from typing import Union
+import numpy as np
+from sorting import iter_mergesort
+
+
+class BitmapIndex:
+    n_elements: int
+    values: list
+    ranks: np.ndarray
+    bitmaps: list
+    n_words: int
+
+    def __init__(self, n_elements, values, ranks, bitmaps, n_words):
+        self.n_elements = n_elements
+        self.values = values
+        self.ranks = ranks
+        self.bitmaps = bitmaps
+        self.n_words = n_words
+
+
+def unpack_bits(bitset: np.ndarray, n_elements: int) -> np.ndarray:
+    """ Returns the positions of the set bits of a packed bitset. """
+
+    bits = np.unpackbits(bitset.view(np.uint8), bitorder='little')[:n_elements]
+    return np.flatnonzero(bits)
+
+
+def build_bitmap_index(points: list, n_dimensions: int) -> Union['BitmapIndex', None]:
+    """ Builds a range-encoded bitmap index over the given points.
+
+    For every dimension, the distinct values are ranked and
+    row r + 1 of that dimension's bitmap matrix marks the
+    points whose value has rank <= r (row 0 is empty). This
+    is meant for discretized, low-cardinality attributes:
+    each dimension costs one bitset per distinct value.
+
+    """
+
+    n_elements = len(points)
+    if n_elements == 0:
+        return None
+
+    coordinates = np.asarray(points, dtype=np.float64).reshape(n_elements, n_dimensions)
+    n_words = (n_elements + 63) // 64
+    values = []
+    ranks = np.empty((n_elements, n_dimensions), dtype=np.int64)
+    bitmaps = []
+    positions = np.arange(n_elements)
+    for axis in range(n_dimensions):
+        axis_values, axis_ranks = np.unique(coordinates[:, axis], return_inverse=True)
+        axis_ranks = axis_ranks.reshape(-1)
+        values.append(axis_values)
+        ranks[:, axis] = axis_ranks
+        # Set bit i of row r + 1 for every point i with rank r, then
+        # accumulate the rows so that row r + 1 marks the ranks <= r
+        axis_bitmaps = np.zeros((len(axis_values) + 1, n_words), dtype=np.uint64)
+        np.bitwise_or.at(axis_bitmaps, (axis_ranks + 1, positions >> 6),
+                         np.uint64(1) << (positions & 63).astype(np.uint64))
+        bitmaps.append(np.bitwise_or.accumulate(axis_bitmaps, axis=0))
+    # Points are rebuilt from values and ranks, so the caller's list is not kept
+    return BitmapIndex(n_elements, values, ranks, bitmaps, n_words)
+
+
+def points_at(index: 'BitmapIndex', positions: np.ndarray) -> list:
+    """ Returns the coordinates of the points at the given positions. """
+
+    return np.column_stack([axis_values[index.ranks[positions, axis]]
+                            for axis, axis_values in enumerate(index.values)]).tolist()
+
+
+def index_size(index: Union['BitmapIndex', None]) -> int:
+    """ Returns the memory (in bytes) used by the index, coordinates included. """
+
+    if index is None:
+        return 0
+    size = sys.getsizeof(index) + index.ranks.nbytes
+    for axis_values, axis_bitmaps in zip(index.values, index.bitmaps):
+        size += axis_values.nbytes + axis_bitmaps.nbytes
+    return size
+
+
+def range_search_bitmap(index: Union['BitmapIndex', None], range_min: list, range_max: list,
+                        n_dimensions: int) -> list:
+    """ Returns the points in [range_min, range_max] (multidimensional search). """
+
+    if index is None:
+        return []
+
+    # Correct ranges
+    for i in range(n_dimensions):
+        if range_min[i] > range_max[i]:
+            t = range_min[i]
+            range_min[i] = range_max[i]
+            range_max[i] = t
+
+    # The points in range for one dimension are those with rank <= hi
+    # and not rank < lo, intersect them over all dimensions
+    in_range = np.full(index.n_words, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for axis in range(n_dimensions):
+        lo = np.searchsorted(index.values[axis], range_min[axis], side='left')
+        hi = np.searchsorted(index.values[axis], range_max[axis], side='right')
+        in_range &= index.bitmaps[axis][hi] & ~index.bitmaps[axis][lo]
+    return points_at(index, unpack_bits(in_range, index.n_elements))
+
+
+def skyline_query_bitmap(index: Union['BitmapIndex', None], n_dimensions: int) -> list:
+    """ Computes the skyline of the points stored in the given bitmap index.
+
+    A point is dominated if some other point is <= in every
+    dimension (AND of the "rank <= r" bitsets) and < in at
+    least one (OR of the "rank < r" bitsets). Points sharing
+    the same ranks share the outcome, so each distinct rank
+    combination is only checked once.
+
+    """
+
+    if index is None:
+        return []
+
+    axes = np.arange(n_dimensions)
+    combinations, inverse = np.unique(index.ranks, axis=0, return_inverse=True)
+    is_skyline = np.empty(len(combinations), dtype=bool)
+    for i, combination in enumerate(combinations):
+        not_worse = np.bitwise_and.reduce(
+            np.stack([index.bitmaps[axis][combination[axis] + 1] for axis in axes]), axis=0)
+        better = np.bitwise_or.reduce(
+            np.stack([index.bitmaps[axis][combination[axis]] for axis in axes]), axis=0)
+        is_skyline[i] = not np.any(not_worse & better)
+
+    # Report the skyline points in ascending order of the first dimension
+    results = points_at(index, np.flatnonzero(is_skyline[inverse.reshape(-1)]))
+    return iter_mergesort(results)
@@ -0,0 +1,213 @@
+import sys
+from typing import Union
+import numpy as np
+from sorting import iter_mergesort
+
+
+class CompactRangeTree:
+    """ Array-backed multidimensional Range tree.
+
+    The coordinates are stored once, in coords. Tree nodes
+    are implicit: a node is a segment [lo, hi) of an index
+    array, its children are [lo, mid) and [mid, hi) with
+    mid = (lo + hi) // 2, and the leaves (one point each)
+    are adjacent in the array, so they need no links.
+
+    layers[()] holds the point indices sorted by dimension 0.
+    The associated structures of all the nodes at depth e of
+    the tree stored in layers[path] are kept side by side in
+    layers[path + (e,)], each segment sorted by the next
+    dimension. Every layer is one int32 array of n entries.
+
+    """
+
+    __slots__ = ('coords', 'layers')
+    coords: np.ndarray
+    layers: dict
+
+    def __init__(self, coords, layers):
+        self.coords = coords
+        self.layers = layers
+
+
+def segment_starts(n_elements: int) -> list:
+    """ Returns, for every depth of the implicit tree, the start of the node holding each position. """
+
+    starts = np.zeros(n_elements, dtype=np.int64)
+    ends = np.full(n_elements, n_elements, dtype=np.int64)
+    positions = np.arange(n_elements)
+    depths = [starts]
+    while np.any(ends - starts > 1):
+        mids = (starts + ends) // 2
+        right = (positions >= mids) & (ends - starts > 1)
+        left = (positions < mids) & (ends - starts > 1)
+        starts = np.where(right, mids, starts)
+        ends = np.where(left, mids, ends)
+        depths.append(starts)
+    return depths
+
+
+def build_compact_range_tree(points: list, n_dimensions: int) -> Union['CompactRangeTree', None]:
+    """ Builds a compact Range tree from a (not necessarily sorted) list of points. """
+
+    n_elements = len(points)
+    if n_elements == 0:
+        return None
+
+    coords = np.asarray(points, dtype=np.float64).reshape(n_elements, n_dimensions)
+    starts = segment_starts(n_elements)
+    layers = {(): np.argsort(coords[:, 0], kind='stable').astype(np.int32)}
+    # Extend every layer into the next dimension, for every depth of its tree.
+    # Nested trees reuse the outer tree's segments, so an inner tree only has
+    # the depths below the node it belongs to.
+    pending = [((), 0)]
+    while pending:
+        path, dimension = pending.pop()
+        if dimension + 1 == n_dimensions:
+            continue
+        layer = layers[path]
+        first_depth = path[-1] if path else 0
+        for depth in range(first_depth, len(starts)):
+            order = np.lexsort((coords[layer, dimension + 1], starts[depth]))
+            layers[path + (depth,)] = layer[order]
+            pending.append((path + (depth,), dimension + 1))
+    return CompactRangeTree(coords, layers)
+
+
+def tree_size(tree: Union['CompactRangeTree', None]) -> int:
+    """ Returns the memory (in bytes) used by the tree, coordinates included. """
+
+    if tree is None:
+        return 0
+    size = sys.getsizeof(tree) + tree.coords.nbytes + sys.getsizeof(tree.layers)
+    for path, layer in tree.layers.items():
+        size += sys.getsizeof(path) + layer.nbytes
+    return size
+
+
+def bytes_per_point(tree: Union['CompactRangeTree', None]) -> float:
+    """ Returns tree_size divided by the number of points. """
+
+    if tree is None:
+        return 0.0
+    return tree_size(tree) / len(tree.coords)
+
+
+def lower_bound(layer: np.ndarray, keys: np.ndarray, lo: int, hi: int, x: float) -> int:
+    """ Returns the first position in [lo, hi) whose key is >= x (hi if there is none). """
+
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if keys[layer[mid]] < x:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def upper_bound(layer: np.ndarray, keys: np.ndarray, lo: int, hi: int, x: float) -> int:
+    """ Returns the first position in [lo, hi) whose key is > x (hi if there is none). """
+
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if keys[layer[mid]] <= x:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def search_layer(tree: CompactRangeTree, path: tuple, lo: int, hi: int, depth: int, dimension: int,
+                 range_min: list, range_max: list, n_dimensions: int, results: list):
+    """ Collects the points of the tree stored in layers[path][lo:hi] that are in range.
+
+    The points in range for the current dimension form a
+    contiguous run of the segment. In the last dimension the
+    run is reported as is, otherwise it is split into the
+    canonical nodes covering it, and each node's associated
+    structure is searched in the next dimension.
+
+    """
+
+    layer = tree.layers[path]
+    keys = tree.coords[:, dimension]
+    a = lower_bound(layer, keys, lo, hi, range_min[dimension])
+    b = upper_bound(layer, keys, a, hi, range_max[dimension])
+    if a >= b:
+        return
+    if dimension + 1 == n_dimensions:
+        results.append(layer[a:b])
+        return
+
+    stack = [(lo, hi, depth)]
+    while stack:
+        s, t, e = stack.pop()
+        if t <= a or b <= s:
+            continue
+        elif a <= s and t <= b:
+            search_layer(tree, path + (e,), s, t, e, dimension + 1, range_min, range_max, n_dimensions, results)
+        else:
+            mid = (s + t) // 2
+            stack.append((mid, t, e + 1))
+            stack.append((s, mid, e + 1))
+
+
+def range_search_compact(tree: Union['CompactRangeTree', None], range_min: list, range_max: list,
+                         n_dimensions: int) -> list:
+    """ Returns the points in [range_min, range_max] (multidimensional search). """
+
+    if tree is None:
+        return []
+
+    # Correct ranges
+    for i in range(n_dimensions):
+        if range_min[i] > range_max[i]:
+            t = range_min[i]
+            range_min[i] = range_max[i]
+            range_max[i] = t
+
+    results = []
+    search_layer(tree, (), 0, len(tree.coords), 0, 0, range_min, range_max, n_dimensions, results)
+    if not results:
+        return []
+    return tree.coords[np.concatenate(results)].tolist()
+
+
+def skyline_query_compact(tree: CompactRangeTree, n_dimensions: int) -> list:
+    """ Computes the skyline of the points stored in the given compact Range tree (as skyline_query_rt does). """
+
+    # First bounding box: left bound is x_min.
+    # Right bound is: x_max[0] in the first dimension,
+    # and for every other dimension the coordinate is
+    # the min value of that dimension.
+    order = tree.layers[()]
+    x_min = tree.coords[order[0]].tolist()
+    x_max = tree.coords[order[-1]].tolist()
+    left_bound = x_min.copy()
+    right_bound = [x_max[0]]
+    for i in range(1, n_dimensions):
+        right_bound.append(float(tree.coords[:, i].min()))
+
+    # Build set of skyline points
+    # x_min is always the first point in the skyline
+    skyline = [x_min.copy()]
+    stop_flag = False
+    while not stop_flag:
+        target_box = range_search_compact(tree, list(left_bound), list(right_bound), n_dimensions)
+        n_points = len(target_box)
+        if n_points == 0:
+            return skyline
+        elif n_points == 1:
+            skyline.append(target_box[0].copy())
+            return skyline
+        # Sort the points in the bounding box.
+        # Then, the first point in the range (after the left bound)
+        # is the next point of the skyline set.
+        target_box = iter_mergesort(list(target_box))
+        skyline.append(target_box[1].copy())
+        # Check if we have reached the end of the x axis
+        if left_bound[0] < target_box[1][0]:
+            left_bound = target_box[1].copy()
+        else:
+            stop_flag = True
+    return skyline
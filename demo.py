@@ -3,8 +3,11 @@ from time import process_time
 import pandas as pd
 import matplotlib.pyplot as plt
 from sorting import iter_mergesort
-from range_tree import build_bbst, skyline_query_rt
-from kd_tree import build_kd_tree, skyline_query_kdt
+from range_tree import build_bbst, skyline_query_rt, tree_size as range_tree_size
+from kd_tree import build_kd_tree, skyline_query_kdt, tree_size as kd_tree_size
+from z_order import build_z_index, skyline_query_zorder, index_size as z_index_size
+from compact_range_tree import build_compact_range_tree, skyline_query_compact, tree_size as compact_tree_size
+from bitmap_index import build_bitmap_index, skyline_query_bitmap, index_size as bitmap_index_size
 
 print("Welcome!")
 print("Please enter the number of dimensions (2 or 3):")
@@ -62,6 +65,23 @@ for i in range(n_rng_iters):
 time_vals_range.append(time_acc / n_rng_iters)
 range_skyline = skyline_query_rt(range_root, n_dimensions)
 
+time_acc = 0
+for i in range(n_rng_iters):
+    start_time = process_time()
+    compact_root = build_compact_range_tree(points, n_dimensions)
+    stop_time = process_time()
+    time_acc += stop_time - start_time
+time_vals_compact = [time_acc / n_rng_iters]
+compact_root = build_compact_range_tree(points, n_dimensions)
+
+time_acc = 0
+for i in range(n_rng_iters):
+    start_time = process_time()
+    compact_skyline = skyline_query_compact(compact_root, n_dimensions)
+    stop_time = process_time()
+    time_acc += stop_time - start_time
+time_vals_compact.append(time_acc / n_rng_iters)
+
 time_acc = 0
 for i in range(n_kd_iters):
     start_time = process_time()
@@ -81,9 +101,100 @@ for i in range(n_kd_iters):
 time_vals_kd.append(time_acc / n_kd_iters)
 kd_skyline = skyline_query_kdt(kd_root, n_dimensions)
 
-row_labels = ['Range Tree', 'k-d Tree']
-column_labels = ['Build Time (ms)', 'Skyline Query Time (ms)']
-data = pd.DataFrame([time_vals_range, time_vals_kd], index=row_labels, columns=column_labels)
+time_acc = 0
+for i in range(n_kd_iters):
+    start_time = process_time()
+    z_index = build_z_index(points, n_dimensions)
+    stop_time = process_time()
+    time_acc += stop_time - start_time
+time_vals_z = [time_acc / n_kd_iters]
+z_index = build_z_index(points, n_dimensions)
+
+time_acc = 0
+for i in range(n_kd_iters):
+    start_time = process_time()
+    z_skyline = skyline_query_zorder(z_index, n_dimensions)
+    stop_time = process_time()
+    time_acc += stop_time - start_time
+time_vals_z.append(time_acc / n_kd_iters)
+
+# The bitmap index targets discretized attributes, so time it on a copy of
+# the points rounded down to bands: 500 m of distance, 10 per night of price.
+# The k-d tree and the compact Range tree are timed on the same copy, so the
+# three banded rows are comparable. The Range tree is left out: its leaf
+# links break on tied coordinates and skyline_query_rt never returns.
+bands = [500, 10, 500]
+band_points = [[(x[i] // bands[i]) * bands[i] for i in range(n_dimensions)] for x in points]
+band_points = iter_mergesort(band_points)
+
+time_acc = 0
+for i in range(n_kd_iters):
+    start_time = process_time()
+    band_kd_root = build_kd_tree(band_points, n_dimensions)
+    stop_time = process_time()
+    time_acc += stop_time - start_time
+    band_points = iter_mergesort(band_points)
+time_vals_band_kd = [time_acc / n_kd_iters]
+band_kd_root = build_kd_tree(band_points, n_dimensions)
+
+time_acc = 0
+for i in range(n_kd_iters):
+    start_time = process_time()
+    band_kd_skyline = skyline_query_kdt(band_kd_root, n_dimensions)
+    stop_time = process_time()
+    time_acc += stop_time - start_time
+time_vals_band_kd.append(time_acc / n_kd_iters)
+
+time_acc = 0
+for i in range(n_rng_iters):
+    start_time = process_time()
+    band_compact_root = build_compact_range_tree(band_points, n_dimensions)
+    stop_time = process_time()
+    time_acc += stop_time - start_time
+time_vals_band_compact = [time_acc / n_rng_iters]
+band_compact_root = build_compact_range_tree(band_points, n_dimensions)
+
+time_acc = 0
+for i in range(n_rng_iters):
+    start_time = process_time()
+    band_compact_skyline = skyline_query_compact(band_compact_root, n_dimensions)
+    stop_time = process_time()
+    time_acc += stop_time - start_time
+time_vals_band_compact.append(time_acc / n_rng_iters)
+
+time_acc = 0
+for i in range(n_kd_iters):
+    start_time = process_time()
+    bitmap_index = build_bitmap_index(band_points, n_dimensions)
+    stop_time = process_time()
+    time_acc += stop_time - start_time
+time_vals_bitmap = [time_acc / n_kd_iters]
+bitmap_index = build_bitmap_index(band_points, n_dimensions)
+
+time_acc = 0
+for i in range(n_kd_iters):
+    start_time = process_time()
+    bitmap_skyline = skyline_query_bitmap(bitmap_index, n_dimensions)
+    stop_time = process_time()
+    time_acc += stop_time - start_time
+time_vals_bitmap.append(time_acc / n_kd_iters)
+
+time_vals_range.append(range_tree_size(range_root) / 1024)
+time_vals_compact.append(compact_tree_size(compact_root) / 1024)
+time_vals_kd.append(kd_tree_size(kd_root) / 1024)
+time_vals_z.append(z_index_size(z_index) / 1024)
+time_vals_band_kd.append(kd_tree_size(band_kd_root) / 1024)
+time_vals_band_compact.append(compact_tree_size(band_compact_root) / 1024)
+time_vals_bitmap.append(bitmap_index_size(bitmap_index) / 1024)
+all_time_vals = [time_vals_range, time_vals_compact, time_vals_kd, time_vals_z,
+                 time_vals_band_kd, time_vals_band_compact, time_vals_bitmap]
+for time_vals in all_time_vals:
+    time_vals.append(time_vals[2] * 1024 / n_points)
+
+row_labels = ['Range Tree', 'Compact Range Tree', 'k-d Tree', 'Z-order',
+              'k-d Tree (banded)', 'Compact Range Tree (banded)', 'Bitmap Index (banded)']
+column_labels = ['Build Time (ms)', 'Skyline Query Time (ms)', 'Index Size (KB)', 'Bytes per Point']
+data = pd.DataFrame(all_time_vals, index=row_labels, columns=column_labels)
 print(data.to_string())
 
 points_x = [x[0] for x in points if x not in kd_skyline]
@@ -1,3 +1,4 @@
+import sys
 from typing import Union
 from sorting import iter_mergesort
 
@@ -283,3 +284,18 @@ def skyline_query_kdt(root: KDNode, n_dimensions: int) -> list:
         else:
             stop_flag = True
     return skyline
+
+
+def tree_size(root: Union['KDNode', None]) -> int:
+    """ Returns the memory (in bytes) used by the tree nodes and the points they store. """
+
+    size = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node is not None:
+            size += sys.getsizeof(node) + sys.getsizeof(vars(node))
+            size += sys.getsizeof(node.point) + sum(sys.getsizeof(x) for x in node.point)
+            stack.append(node.left_child)
+            stack.append(node.right_child)
+    return size
@@ -0,0 +1,94 @@
+import argparse
+import asyncio
+import json
+import random
+from time import perf_counter
+from query_service import BOUNDS
+
+
+def random_queries(n_distinct: int, n_dimensions: int) -> list:
+    """ Produces a pool of distinct requests: one skyline query and n_distinct - 1 range queries. """
+
+    queries = [{'endpoint': 'skyline', 'params': {}}]
+    for i in range(n_distinct - 1):
+        range_min = []
+        range_max = []
+        for axis in range(n_dimensions):
+            low, high = BOUNDS[axis]
+            a = round(random.uniform(low, high), 2)
+            b = round(random.uniform(low, high), 2)
+            range_min.append(min(a, b))
+            range_max.append(max(a, b))
+        queries.append({'endpoint': 'range', 'params': {'range_min': range_min, 'range_max': range_max}})
+    return queries
+
+
+async def open_connection(host: str, port: int, unix_path):
+    if unix_path is not None:
+        return await asyncio.open_unix_connection(unix_path, limit=2 ** 26)
+    return await asyncio.open_connection(host, port, limit=2 ** 26)
+
+
+async def run_client(connection, queries: list, n_requests: int, latencies: list, errors: list):
+    """ Sends n_requests random queries from the pool, one at a time, over one connection. """
+
+    reader, writer = connection
+    for i in range(n_requests):
+        request = dict(random.choice(queries), id=i)
+        start_time = perf_counter()
+        writer.write((json.dumps(request) + '\n').encode())
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        latencies.append(perf_counter() - start_time)
+        if not response['ok']:
+            errors.append(response['error'])
+    writer.close()
+
+
+async def run_load(args) -> dict:
+    connections = [await open_connection(args.host, args.port, args.unix) for i in range(args.concurrency)]
+    queries = random_queries(args.distinct, args.dimensions)
+    latencies = []
+    errors = []
+    start_time = perf_counter()
+    await asyncio.gather(*[run_client(connection, queries, args.requests, latencies, errors)
+                           for connection in connections])
+    elapsed = perf_counter() - start_time
+
+    # Ask the service for its own view of the run
+    reader, writer = await open_connection(args.host, args.port, args.unix)
+    writer.write((json.dumps({'id': 0, 'endpoint': 'stats'}) + '\n').encode())
+    await writer.drain()
+    stats = json.loads(await reader.readline())['result']
+    writer.close()
+
+    latencies.sort()
+    n_sent = len(latencies)
+    return {
+        'requests': n_sent,
+        'errors': len(errors),
+        'seconds': elapsed,
+        'throughput_rps': n_sent / elapsed if elapsed else 0.0,
+        'client_p50_ms': latencies[int(0.5 * (n_sent - 1))] * 1000 if n_sent else 0.0,
+        'client_p99_ms': latencies[int(0.99 * (n_sent - 1))] * 1000 if n_sent else 0.0,
+        'server': stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for query_service.py.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help="connect to this Unix socket instead of TCP")
+    parser.add_argument('--dimensions', type=int, default=2, choices=[2, 3],
+                        help="must match the service's dataset")
+    parser.add_argument('--concurrency', type=int, default=16, help="number of connections")
+    parser.add_argument('--requests', type=int, default=100, help="requests per connection")
+    parser.add_argument('--distinct', type=int, default=8,
+                        help="size of the query pool, fewer distinct queries coalesce more")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run_load(args)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+import argparse
+import asyncio
+import bisect
+import json
+import random
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Union
+from sorting import iter_mergesort
+from kd_tree import KDNode, build_kd_tree, range_search, skyline_query_kdt
+
+# Value ranges of the random dataset (same as demo.py): distance to beach,
+# price per night and distance to city.
+BOUNDS = [(400, 20000), (100, 350), (400, 20000)]
+
+# Upper bounds (in ms) of the latency histogram buckets, the last one catches the rest
+BUCKET_BOUNDS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf')]
+
+
+def random_points(n_points: int, n_dimensions: int) -> list:
+    """ Produces a random dataset like the one in demo.py. """
+
+    points = []
+    for i in range(n_points):
+        points.append([round(random.uniform(*BOUNDS[axis]), 2) for axis in range(n_dimensions)])
+    return points
+
+
+class TreeSnapshot:
+    """ A k-d tree that is never modified after it is built.
+
+    Queries keep a reference to the snapshot they started on,
+    so a rebuild only has to swap the service's reference.
+
+    """
+
+    root: Union['KDNode', None]
+    n_dimensions: int
+    n_points: int
+    version: int
+
+    def __init__(self, root, n_dimensions, n_points, version):
+        self.root = root
+        self.n_dimensions = n_dimensions
+        self.n_points = n_points
+        self.version = version
+
+
+def build_snapshot(points: list, n_dimensions: int, version: int) -> TreeSnapshot:
+    """ Checks and sorts the given points and builds a new snapshot from them.
+
+    Raises ValueError if a point does not have n_dimensions
+    numeric coordinates. Meant to run in the executor, since
+    it goes through the whole dataset.
+
+    """
+
+    points = [[float(x) for x in point] for point in points]
+    if any(len(x) != n_dimensions for x in points):
+        raise ValueError("every point must have " + str(n_dimensions) + " coordinates")
+    points = iter_mergesort(points)
+    return TreeSnapshot(build_kd_tree(points, n_dimensions), n_dimensions, len(points), version)
+
+
+class LatencyHistogram:
+    counts: list
+    n_samples: int
+    total: float
+    max: float
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKET_BOUNDS)
+        self.n_samples = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, ms)] += 1
+        self.n_samples += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, fraction: float) -> float:
+        """ Returns the upper bound of the bucket holding the given fraction of the samples. """
+
+        threshold = fraction * self.n_samples
+        accumulated = 0
+        for bound, count in zip(BUCKET_BOUNDS, self.counts):
+            accumulated += count
+            if accumulated >= threshold:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        buckets = {}
+        for bound, count in zip(BUCKET_BOUNDS, self.counts):
+            buckets['<=' + str(bound) if bound != float('inf') else '+inf'] = count
+        return {
+            'count': self.n_samples,
+            'mean_ms': self.total / self.n_samples if self.n_samples else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': self.max,
+            'buckets': buckets,
+        }
+
+
+class QueryService:
+    """ Answers skyline and range queries over a shared tree snapshot.
+
+    Tree traversals run in a bounded thread pool, so the event
+    loop keeps serving connections. Identical queries on the
+    same snapshot that overlap in time share one computation.
+
+    """
+
+    snapshot: TreeSnapshot
+    executor: ThreadPoolExecutor
+    max_pending: int
+    slots: Union[asyncio.Semaphore, None]
+    in_flight: dict
+    histograms: dict
+    n_computed: int
+    n_coalesced: int
+    next_version: int
+
+    def __init__(self, snapshot, max_workers=4, max_pending=64):
+        self.snapshot = snapshot
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_pending = max_pending
+        # Created by serve(), it must belong to the running event loop
+        self.slots = None
+        self.in_flight = {}
+        self.histograms = {}
+        self.n_computed = 0
+        self.n_coalesced = 0
+        self.next_version = snapshot.version + 1
+
+    async def run_in_executor(self, function, *args):
+        """ Runs CPU-heavy work in the pool, waiting while max_pending jobs are queued. """
+
+        async with self.slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, function, *args)
+
+    async def coalesce(self, key: tuple, function, *args):
+        """ Joins the computation running for key, or starts it if there is none. """
+
+        task = self.in_flight.get(key)
+        if task is None:
+            self.n_computed += 1
+            task = asyncio.ensure_future(self.run_in_executor(function, *args))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        else:
+            self.n_coalesced += 1
+        # Shielded, so that a client going away does not cancel the others' result
+        return await asyncio.shield(task)
+
+    async def skyline(self, params: dict) -> list:
+        snapshot = self.snapshot
+        if snapshot.root is None:
+            return []
+        return await self.coalesce(('skyline', snapshot.version),
+                                   skyline_query_kdt, snapshot.root, snapshot.n_dimensions)
+
+    async def range(self, params: dict) -> list:
+        snapshot = self.snapshot
+        range_min = [float(x) for x in params['range_min']]
+        range_max = [float(x) for x in params['range_max']]
+        if len(range_min) != snapshot.n_dimensions or len(range_max) != snapshot.n_dimensions:
+            raise ValueError("range bounds must have " + str(snapshot.n_dimensions) + " coordinates")
+        # range_search corrects the bounds in place, pass copies
+        return await self.coalesce(('range', snapshot.version, tuple(range_min), tuple(range_max)),
+                                   lambda: range_search(snapshot.root, range_min.copy(), range_max.copy(),
+                                                        snapshot.n_dimensions))
+
+    async def rebuild(self, params: dict) -> dict:
+        n_dimensions = int(params.get('n_dimensions', self.snapshot.n_dimensions))
+        points = params['points']
+        # Versions follow the order the rebuilds were requested in, not the
+        # order they finish in, so an older dataset never replaces a newer one
+        version = self.next_version
+        self.next_version += 1
+        snapshot = await self.run_in_executor(build_snapshot, points, n_dimensions, version)
+        if self.snapshot.version > version:
+            return {'version': version, 'n_points': snapshot.n_points, 'superseded_by': self.snapshot.version}
+        # Swapping the reference is atomic: running queries keep the old snapshot
+        self.snapshot = snapshot
+        return {'version': snapshot.version, 'n_points': snapshot.n_points}
+
+    async def stats(self, params: dict) -> dict:
+        return {
+            'version': self.snapshot.version,
+            'n_points': self.snapshot.n_points,
+            'n_dimensions': self.snapshot.n_dimensions,
+            'computed': self.n_computed,
+            'coalesced': self.n_coalesced,
+            'latency': {name: histogram.summary() for name, histogram in self.histograms.items()},
+        }
+
+    async def handle_request(self, request: dict) -> dict:
+        if not isinstance(request, dict):
+            return {'id': None, 'ok': False, 'error': "request must be a JSON object"}
+        endpoint = request.get('endpoint')
+        handlers = {'skyline': self.skyline, 'range': self.range,
+                    'rebuild': self.rebuild, 'stats': self.stats}
+        if endpoint not in handlers:
+            return {'id': request.get('id'), 'ok': False, 'error': "unknown endpoint: " + str(endpoint)}
+        start_time = perf_counter()
+        try:
+            response = {'id': request.get('id'), 'ok': True,
+                        'result': await handlers[endpoint](request.get('params', {}))}
+        except Exception as error:
+            # Every request gets a reply, whatever went wrong with it
+            response = {'id': request.get('id'), 'ok': False, 'error': repr(error)}
+        if endpoint not in self.histograms:
+            self.histograms[endpoint] = LatencyHistogram()
+        self.histograms[endpoint].record(perf_counter() - start_time)
+        return response
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """ Reads one JSON request per line; responses carry the request id and may come out of order.
+
+        At most max_pending requests of a connection are handled
+        at a time. Beyond that the connection is not read, so a
+        client pipelining requests is slowed down by TCP instead
+        of filling the service's memory.
+
+        """
+
+        write_lock = asyncio.Lock()
+        requests_left = asyncio.Semaphore(self.max_pending)
+
+        async def respond(line):
+            try:
+                request = json.loads(line)
+            except ValueError as error:
+                response = {'id': None, 'ok': False, 'error': repr(error)}
+            else:
+                response = await self.handle_request(request)
+            async with write_lock:
+                try:
+                    writer.write((json.dumps(response) + '\n').encode())
+                    await writer.drain()
+                except ConnectionError:
+                    # The client went away, there is no one left to answer
+                    pass
+
+        tasks = set()
+        try:
+            while True:
+                await requests_left.acquire()
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.ensure_future(respond(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda _: requests_left.release())
+            if tasks:
+                await asyncio.wait(tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8765, unix_path: Union[str, None] = None):
+        """ Listens on a TCP port, or on a Unix socket if unix_path is given, until cancelled. """
+
+        self.slots = asyncio.Semaphore(self.max_pending)
+        # Allow long lines, rebuild requests carry the whole dataset
+        limit = 2 ** 26
+        if unix_path is not None:
+            server = await asyncio.start_unix_server(self.handle_connection, unix_path, limit=limit)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port, limit=limit)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local skyline/range query service over a k-d tree.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help="serve on this Unix socket instead of TCP")
+    parser.add_argument('--points', type=int, default=10000, help="size of the random dataset")
+    parser.add_argument('--dimensions', type=int, default=2, choices=[2, 3])
+    parser.add_argument('--workers', type=int, default=4, help="threads running the queries")
+    parser.add_argument('--pending', type=int, default=64, help="max queued queries, overall and per connection")
+    args = parser.parse_args()
+
+    snapshot = build_snapshot(random_points(args.points, args.dimensions), args.dimensions, 0)
+    service = QueryService(snapshot, args.workers, args.pending)
+    print("Serving " + str(args.points) + " points on " + (args.unix or args.host + ':' + str(args.port)))
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.executor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
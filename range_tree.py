@@ -1,3 +1,4 @@
+import sys
 from typing import Union
 from sorting import iter_mergesort
 
@@ -257,3 +258,23 @@ def skyline_query_rt(root: RangeNode, n_dimensions: int) -> list:
         else:
             stop_flag = True
     return skyline
+
+
+def tree_size(root: Union['RangeNode', None]) -> int:
+    """ Returns the memory (in bytes) used by the nodes of all nested trees and the points they store. """
+
+    size = 0
+    counted_points = set()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node is not None:
+            size += sys.getsizeof(node) + sys.getsizeof(vars(node))
+            # Nested trees share the same point lists, count each one once
+            if id(node.point) not in counted_points:
+                counted_points.add(id(node.point))
+                size += sys.getsizeof(node.point) + sum(sys.getsizeof(x) for x in node.point)
+            stack.append(node.left_child)
+            stack.append(node.right_child)
+            stack.append(node.subtree_root)
+    return size
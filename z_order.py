@@ -0,0 +1,145 @@
+import sys
+from typing import Union
+import numpy as np
+from sorting import iter_mergesort
+
+
+class ZIndex:
+    coords: np.ndarray
+    ranks: np.ndarray
+    codes: np.ndarray
+    bits: int
+    total_bits: int
+
+    def __init__(self, coords, ranks, codes, bits):
+        self.coords = coords
+        self.ranks = ranks
+        self.codes = codes
+        self.bits = bits
+        self.total_bits = bits * ranks.shape[1]
+
+
+def quantize(coords: np.ndarray, n_dimensions: int) -> np.ndarray:
+    """ Maps the coordinates of every dimension to their (dense) ranks.
+
+    Ranks preserve the order of the values of each dimension,
+    so dominance between two points is the same whether it is
+    checked on the coordinates or on the ranks.
+
+    """
+
+    ranks = np.empty(coords.shape, dtype=np.int64)
+    for axis in range(n_dimensions):
+        ranks[:, axis] = np.unique(coords[:, axis], return_inverse=True)[1].reshape(-1)
+    return ranks
+
+
+def interleave_bits(cells: np.ndarray, bits: int) -> np.ndarray:
+    """ Computes the Morton code (Z-address) of every row of cells.
+
+    Bit b of axis i ends up in bit (b * n_dimensions + n_dimensions - 1 - i)
+    of the code, so axis 0 holds the most significant bit of every group.
+    Each step works on all the points at once.
+
+    """
+
+    n_dimensions = cells.shape[1]
+    cells = cells.astype(np.uint64)
+    codes = np.zeros(cells.shape[0], dtype=np.uint64)
+    for b in range(bits):
+        for axis in range(n_dimensions):
+            bit = (cells[:, axis] >> np.uint64(b)) & np.uint64(1)
+            codes |= bit << np.uint64(b * n_dimensions + n_dimensions - 1 - axis)
+    return codes
+
+
+def build_z_index(points: list, n_dimensions: int) -> Union['ZIndex', None]:
+    """ Sorts the given points along the Z-order curve.
+
+    Coordinates are quantized to ranks and the ranks are
+    interleaved into 64-bit Morton codes. If the ranks need
+    more than 64 / n_dimensions bits, only their most
+    significant bits are kept for the codes; the exact ranks
+    are still used for every dominance check.
+
+    """
+
+    n_elements = len(points)
+    if n_elements == 0:
+        return None
+
+    coords = np.asarray(points, dtype=np.float64).reshape(n_elements, n_dimensions)
+    ranks = quantize(coords, n_dimensions)
+    rank_bits = max(int(ranks.max()).bit_length(), 1)
+    bits = min(rank_bits, 64 // n_dimensions)
+    codes = interleave_bits(ranks >> (rank_bits - bits), bits)
+    # If a point dominates another its code is never greater, and when the
+    # codes are equal (lossy codes) its rank sum is smaller: sorting by both
+    # keys guarantees that dominating points are always visited first.
+    order = np.lexsort((ranks.sum(axis=1), codes))
+    # The coordinates are copied into the index (in Z-order), so the caller
+    # may re-sort or modify their list afterwards
+    return ZIndex(coords[order], ranks[order], codes[order], bits)
+
+
+def index_size(index: Union['ZIndex', None]) -> int:
+    """ Returns the memory (in bytes) used by the index, coordinates included. """
+
+    if index is None:
+        return 0
+    return sys.getsizeof(index) + index.coords.nbytes + index.ranks.nbytes + index.codes.nbytes
+
+
+def region_is_dominated(skyline: np.ndarray, region_min: np.ndarray) -> bool:
+    """ Checks if any skyline point dominates every point above region_min. """
+
+    if skyline.shape[0] == 0:
+        return False
+    return bool(np.any(np.all(skyline <= region_min, axis=1) & np.any(skyline < region_min, axis=1)))
+
+
+def skyline_query_zorder(index: Union['ZIndex', None], n_dimensions: int, leaf_size: int = 32) -> list:
+    """ Computes the skyline of the points stored in the given Z-order index.
+
+    This function implements a ZSky-style scan. Points are
+    visited in Z-order, so a point can only be dominated by
+    skyline points found before it. The sorted codes are
+    split recursively into Z-regions (runs of codes sharing
+    a prefix); a region whose min corner is dominated by a
+    skyline point is skipped as a whole, and regions with at
+    most leaf_size points are checked point by point.
+
+    """
+
+    if index is None:
+        return []
+
+    n_elements = len(index.ranks)
+    skyline = np.empty((n_elements, n_dimensions), dtype=np.int64)
+    found = []
+    # Each region is (first, last + 1, number of shared prefix bits).
+    # Regions are popped in Z-order, so the lower half is pushed last.
+    stack = [(0, n_elements, 0)]
+    while stack:
+        lo, hi, level = stack.pop()
+        ranks = index.ranks[lo:hi]
+        if region_is_dominated(skyline[:len(found)], ranks.min(axis=0)):
+            continue
+        if hi - lo <= leaf_size or level == index.total_bits:
+            for i in range(hi - lo):
+                if not region_is_dominated(skyline[:len(found)], ranks[i]):
+                    skyline[len(found)] = ranks[i]
+                    found.append(lo + i)
+            continue
+        # Split the region on the next bit of the prefix
+        shift = index.total_bits - level - 1
+        boundary = ((int(index.codes[lo]) >> (shift + 1)) << (shift + 1)) | (1 << shift)
+        mid = lo + int(np.searchsorted(index.codes[lo:hi], np.uint64(boundary)))
+        if mid < hi:
+            stack.append((mid, hi, level + 1))
+        if mid > lo:
+            stack.append((lo, mid, level + 1))
+
+    # Report the skyline points in ascending order of the first dimension
+    results = index.coords[found].tolist()
+    return iter_mergesort(results)